@@ -44,7 +44,10 @@ setup(
     author="RealDolos, szero",
     author_email="dolos@cock.li, singleton@tfwno.gf",
     packages=["volapi"],
-    extras_require={"FAST_JSON": ["orjson>=3,<4"]},
+    extras_require={
+        "FAST_JSON": ["orjson>=3,<4"],
+        "FAST_LOOP": ['uvloop; sys_platform != "win32"'],
+    },
     include_package_data=True,
     classifiers=[
         "Development Status :: 5 - Production/Stable",
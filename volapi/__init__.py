@@ -5,5 +5,5 @@ Copyright © 2018 Szero
 See LICENSE
 """
 
-from .volapi import Room, listen_many
+from .volapi import Room, listen_many, listen_many_async
 from .constants import __version__
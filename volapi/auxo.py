@@ -12,7 +12,7 @@ import asyncio
 
 from collections import namedtuple, defaultdict
 from functools import wraps
-from threading import Thread, Event, RLock, Condition, Barrier, get_ident
+from threading import Thread, Event, Lock, RLock, Condition, Barrier, get_ident
 from urllib.parse import urlsplit
 from copy import copy
 
@@ -20,6 +20,11 @@ from requests import Request
 from requests.cookies import get_cookie_header
 from autobahn.asyncio.websocket import WebSocketClientFactory, WebSocketClientProtocol
 
+try:
+    from uvloop import new_event_loop
+except ImportError:
+    from asyncio import new_event_loop
+
 
 logger = logging.getLogger(__name__)
 
@@ -56,7 +61,7 @@ def call_sync(func):
         if self.thread.ident == get_ident():
             return func(self, *args, **kw)
 
-        barrier = Barrier(2)
+        done = Event()
         result = None
         ex = None
 
@@ -68,10 +73,10 @@ def call_sync(func):
             except Exception as exc:
                 ex = exc
             finally:
-                barrier.wait()
+                done.set()
 
         self.loop.call_soon_threadsafe(call)
-        barrier.wait()
+        done.wait()
         if ex:
             raise ex or Exception("Unknown error")
         return result
@@ -91,30 +96,29 @@ class Awakener:
     event loop thread, therefore problem solved
     """
 
-    def __init__(self, condition):
+    def __init__(self, condition, waiters):
         self.condition = condition
-        self.count = 0
-        self.lock = RLock()
+        self.waiters = waiters
         self.event = Event()
         self.thread = Thread(daemon=True, target=self.target)
         self.thread.start()
 
     def __call__(self):
-        with self.lock:
-            self.count += 1
         self.event.set()
 
     def target(self):
         """Thread routine"""
         while self.event.wait():
+            # everything awakened until now is covered by a single notify
             self.event.clear()
-            while True:
-                with self.lock:
-                    if not self.count:
-                        break
-                    self.count -= 1
-                with self.condition:
-                    self.condition.notify_all()
+            with self.condition:
+                self.condition.notify_all()
+            for loop, event in list(self.waiters):
+                try:
+                    loop.call_soon_threadsafe(event.set)
+                except RuntimeError:
+                    # loop closed while its waiter was still registered
+                    pass
 
 
 class ListenerArbitrator:
@@ -123,17 +127,61 @@ class ListenerArbitrator:
     def __init__(self):
         self.loop = None
         self.condition = Condition()
+        # listening thread -> ids of connections with data queued for it
+        self.ready = defaultdict(set)
+        self.ready_lock = Lock()
+        # (loop, asyncio.Event) of every running listen_many_async
+        self.waiters = set()
         barrier = Barrier(2)
-        self.awaken = Awakener(self.condition)
+        self.awaken = Awakener(self.condition, self.waiters)
         self.thread = Thread(daemon=True, target=lambda: self._loop(barrier))
         self.thread.start()
         barrier.wait()
 
+    def mark_ready(self, conn, threads):
+        """Remember that conn has data queued for the listeners of threads"""
+
+        with self.ready_lock:
+            for thread in threads:
+                self.ready[thread].add(id(conn))
+
+    def has_ready(self, thread, conns):
+        """Whether any of the connection ids in conns has data queued for
+        the given thread"""
+
+        with self.ready_lock:
+            ready = self.ready.get(thread)
+            return bool(ready) and not ready.isdisjoint(conns)
+
+    def take_ready(self, thread, conns):
+        """Takes the marks of the connection ids in conns that have data
+        queued for the given thread, leaving the marks of any others"""
+
+        with self.ready_lock:
+            ready = self.ready.get(thread)
+            if not ready:
+                return set()
+            taken = ready.intersection(conns)
+            ready -= taken
+            if not ready:
+                del self.ready[thread]
+            return taken
+
+    def drop_ready(self, conn):
+        """Forgets the marks of conn for all threads, once it is closed"""
+
+        cid = id(conn)
+        with self.ready_lock:
+            for thread, ready in list(self.ready.items()):
+                ready.discard(cid)
+                if not ready:
+                    del self.ready[thread]
+
     def _loop(self, barrier):
         """Actual thread"""
 
         if sys.platform != "win32":
-            self.loop = asyncio.new_event_loop()
+            self.loop = new_event_loop()
         else:
             self.loop = asyncio.ProactorEventLoop()
         asyncio.set_event_loop(self.loop)
@@ -171,8 +219,6 @@ class ListenerArbitrator:
         """Sends a message"""
 
         try:
-            if not isinstance(payload, bytes):
-                payload = payload.encode("utf-8")
             if not proto.connected:
                 raise IOError("not connected")
             proto.sendMessage(payload)
@@ -181,9 +227,29 @@ class ListenerArbitrator:
             logger.exception("Failed to send message with payload of:\n%r", payload)
             proto.reraise(ex)
 
-    @call_async
+    def __flush_outbox(self, proto):
+        """Sends everything queued in the outbox of proto, in order"""
+
+        with proto.outbox_lock:
+            payloads = proto.outbox
+            proto.outbox = []
+        for payload in payloads:
+            self.__send_message(proto, payload)
+
     def send_message(self, proto, payload):
-        self.__send_message(proto, payload)
+        """Queues a message to be sent from the loop thread"""
+
+        self.send_messages(proto, (payload,))
+
+    def send_messages(self, proto, payloads):
+        """Queues multiple messages to be sent from the loop thread.
+        Messages queued before the outbox is flushed share a single hop"""
+
+        with proto.outbox_lock:
+            flush = not proto.outbox
+            proto.outbox.extend(payloads)
+        if flush:
+            self.loop.call_soon_threadsafe(self.__flush_outbox, proto)
 
     @call_sync
     def close(self, proto):
@@ -255,6 +321,13 @@ class Listeners(namedtuple("Listeners", ("callbacks", "queue", "enlock", "lock")
         with self.enlock:
             self.queue[item_type].append(item)
 
+    def enqueue_many(self, items):
+        """Queue multiple (type, data) items at once"""
+
+        with self.enlock:
+            for item_type, item in items:
+                self.queue[item_type].append(item)
+
     def __len__(self):
         """Return number of listeners in collection"""
 
@@ -272,6 +345,9 @@ class Protocol(WebSocketClientProtocol):
         self.max_id = 0
         self.send_count = 1
         self.session = None
+        # payloads waiting for the loop thread to send them
+        self.outbox = []
+        self.outbox_lock = Lock()
 
     def onConnect(self, _response):
         self.connected = True
@@ -279,13 +355,12 @@ class Protocol(WebSocketClientProtocol):
     async def onOpen(self):
         await self.conn.on_open()
 
-    def onMessage(self, payload, isBinary):
+    def onMessage(self, payload, _isBinary):
         if not payload:
             logger.warning("empty frame!")
             return
         try:
-            if not isBinary:
-                payload = payload.decode("utf-8")
+            # leave text frames as bytes, the json parser takes them as is
             self.conn.on_message(payload)
         except Exception:
             logger.exception("something went horribly wrong")
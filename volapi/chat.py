@@ -2,10 +2,16 @@ import warnings
 
 
 from enum import Enum
+from types import MappingProxyType
 
 
 from .utils import html_to_text
 
+# Shared read-only defaults, so plain text messages without files or
+# rooms do not allocate fresh empty containers each time
+EMPTY_DICT = MappingProxyType({})
+EMPTY_TUPLE = ()
+
 
 class Roles(Enum):
     """All recognized roles"""
@@ -73,18 +79,20 @@ class ChatMessage(str):
         for entry in obj.roles:
             if entry not in Roles:
                 raise ValueError("Invalid role")
-        obj.options = options or {}
+        obj.options = options or EMPTY_DICT
 
         # Optionals
-        obj.files = kw.get("files", [])
-        obj.rooms = kw.get("rooms", {})
-        obj.data = kw.get("data", {})
+        obj.files = kw.get("files") or EMPTY_TUPLE
+        obj.rooms = kw.get("rooms") or EMPTY_DICT
+        obj.data = kw.get("data") or EMPTY_DICT
         obj.mymsg = obj.data.get("self", False)
         return obj
 
     @staticmethod
     def from_data(room, conn, data):
-        """Construct a ChatMessage instance from raw protocol data"""
+        """Construct a ChatMessage instance from raw protocol data.
+        `data` is expected to come out of `utils.from_json`, so it is
+        parsed by orjson when available."""
         files = []
         rooms = {}
         msg = ""
@@ -115,8 +123,8 @@ class ChatMessage(str):
                 warnings.warn(f"unknown message type '{ptype}'", Warning)
 
         nick = data.get("nick") or data.get("user")
-        options = data.get("options", {})
-        data = data.get("data", {})
+        options = data.get("options") or EMPTY_DICT
+        data = data.get("data") or EMPTY_DICT
 
         message = ChatMessage(
             room,
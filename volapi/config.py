@@ -26,6 +26,10 @@ class Config(dict):
             file_ttl=("file_ttl", int),
             creation_time=("created_time", int),
         )
+        # server key -> (our key, type), so updates only visit what they carry
+        self.__reverse_mapping = {
+            real: (k, typ) for k, (real, typ) in self.__cfg_mapping.items()
+        }
 
     def __getattr__(self, key):
         if key not in self.__cfg_mapping:
@@ -33,13 +37,13 @@ class Config(dict):
         return self[key]
 
     def update(self, config):
-        for k, v in self.__cfg_mapping.items():
-            if v[0] not in config:
+        mapping = self.__reverse_mapping
+        for real, value in config.items():
+            entry = mapping.get(real)
+            if entry is None:
                 continue
-            if isinstance(config[v[0]], v[1]):
-                self[k] = config[v[0]]
-            else:
-                self[k] = v[1]()
+            k, typ = entry
+            self[k] = value if isinstance(value, typ) else typ()
 
     def get_real_key(self, key):
         return self.__cfg_mapping[key][0]
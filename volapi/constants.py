@@ -5,3 +5,8 @@ BASE_URL = "https://volafile.org"
 REST = "/rest/"
 BASE_REST_URL = BASE_URL + REST
 BASE_WS_URL = "wss://volafile.org/api/"
+
+# engine.io packet types we send
+PING = b"2"
+MESSAGE = b"4"
+UPGRADE = b"5"
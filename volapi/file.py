@@ -1,13 +1,48 @@
 import time
 
+try:
+    from functools import cached_property
+except ImportError:
+    # python < 3.8, just recompute every time
+    cached_property = property
 
 from .constants import BASE_URL
 
+# Metadata that might only be known after querying `fileinfo`
+LAZY_ATTRIBUTES = (
+    "filetype",
+    "size",
+    "expire_time",
+    "uploader",
+    "checksum",
+    "info",
+    "thumb",
+)
+
+# Placeholder for metadata we did not get yet
+MISSING = object()
+
+CACHED_PROPERTIES = (
+    "url",
+    "thumbnail",
+    "resolution",
+    "duration",
+    "album",
+    "artist",
+    "codec",
+    "title",
+)
+
 
 class File:
     """Basically a struct for a file's info on volafile, with an additional
     method to retrieve the file's URL."""
 
+    # __dict__ is only there to hold cached properties
+    __slots__ = ("room", "conn", "fid", "name", "updated", "__dict__") + tuple(
+        f"_{attr}" for attr in LAZY_ATTRIBUTES
+    )
+
     def __init__(self, room, conn, file_id, name, **kw):
         self.room = room
         self.conn = conn
@@ -15,50 +50,100 @@ class File:
         self.name = name
         # Flag to check if we queried `fileinfo` for this file already
         self.updated = False
-        self.__additional = dict(kw)
-
-    def __getattr__(self, name):
-        if name not in (
-            "filetype",
-            "size",
-            "expire_time",
-            "uploader",
-            "checksum",
-            "info",
-            "thumb",
-        ):
-            raise AttributeError(f"Not a valid key: {name}")
-        try:
-            return self.__additional[name]
-        except KeyError:
-            self.__fileupdate(self.room.fileinfo(self.fid))
-            return self.__additional[name]
-
-    def __fileupdate(self, data):
+        for attr in LAZY_ATTRIBUTES:
+            setattr(self, f"_{attr}", kw.get(attr, MISSING))
+
+    @property
+    def filetype(self):
+        """Type of the file, one of book, image, video, audio, archive or other"""
+
+        if self._filetype is MISSING:
+            self.__hydrate()
+        return self._filetype
+
+    @property
+    def size(self):
+        """Size of the file in bytes"""
+
+        if self._size is MISSING:
+            self.__hydrate()
+        return self._size
+
+    @property
+    def expire_time(self):
+        """Unix timestamp of when the file expires"""
+
+        if self._expire_time is MISSING:
+            self.__hydrate()
+        return self._expire_time
+
+    @property
+    def uploader(self):
+        """Name of the uploader"""
+
+        if self._uploader is MISSING:
+            self.__hydrate()
+        return self._uploader
+
+    @property
+    def checksum(self):
+        """MD5 checksum of the file"""
+
+        if self._checksum is MISSING:
+            self.__hydrate()
+        return self._checksum
+
+    @property
+    def info(self):
+        """Dict of type specific metadata, like resolution or codec"""
+
+        if self._info is MISSING:
+            self.__hydrate()
+        return self._info
+
+    @property
+    def thumb(self):
+        """Dict with thumbnail information of media files"""
+
+        if self._thumb is MISSING:
+            self.__hydrate()
+        return self._thumb
+
+    def __hydrate(self):
+        """Fill in the extra metadata fields we do not know yet"""
+
+        self.fileupdate(self.room.fileinfo(self.fid))
+
+    def fileupdate(self, data):
         """Method to update extra metadata fields with dict obtained
-        through `fileinfo`"""
+        through `fileinfo`. Shouldn't be used by the user."""
 
         self.name = data["name"]
-        add = self.__additional
-        add["filetype"] = "other"
-        for filetype in ("book", "image", "video", "audio", "archive"):
-            if filetype in data:
-                add["filetype"] = filetype
+        # drop values derived from stale metadata
+        for key in CACHED_PROPERTIES:
+            self.__dict__.pop(key, None)
+        filetype = "other"
+        for candidate in ("book", "image", "video", "audio", "archive"):
+            if candidate in data:
+                filetype = candidate
                 break
-        if add["filetype"] in ("image", "video", "audio"):
-            add["thumb"] = data.get("thumb", {})
+        self._filetype = filetype
+        if filetype in ("image", "video", "audio"):
+            self._thumb = data.get("thumb", {})
+        else:
+            self._thumb = {}
         # checksum is md5
-        add["checksum"] = data["checksum"]
-        add["expire_time"] = data["expires"] / 1000
-        add["size"] = data["size"]
-        add["info"] = data.get(add["filetype"], {})
-        add["uploader"] = data["user"]
+        self._checksum = data["checksum"]
+        self._expire_time = data["expires"] / 1000
+        self._size = data["size"]
+        self._info = data.get(filetype, {})
+        self._uploader = data["user"]
         if self.room.admin:
-            add["info"].update({"room": data.get("room")})
-            add["info"].update({"uploader_ip": data.get("uploader_ip")})
+            self._info.update({"room": data.get("room")})
+            self._info.update({"uploader_ip": data.get("uploader_ip")})
         self.updated = True
 
-    @property
+    @cached_property
     def url(self):
         """Gets the download url of the file"""
 
@@ -76,7 +161,7 @@ class File:
 
         return self.expire_time - time.time()
 
-    @property
+    @cached_property
     def thumbnail(self):
         """Returns the thumbnail's url for this image, audio, or video file.
         Returns empty string if the file has no thumbnail"""
@@ -87,7 +172,7 @@ class File:
         url = f"https://{thumb_srv}" if thumb_srv else None
         return f"{url}/asset/{self.fid}/thumb" if url else ""
 
-    @property
+    @cached_property
     def resolution(self):
         """Gets the resolution of this image or video file in format (W, H)"""
 
@@ -95,7 +180,7 @@ class File:
             raise RuntimeError("Only videos and images have resolutions")
         return (self.info["width"], self.info["height"])
 
-    @property
+    @cached_property
     def duration(self):
         """Returns the duration in seconds of this audio or video file"""
 
@@ -103,7 +188,7 @@ class File:
             raise RuntimeError("Only videos and audio have durations")
         return self.info.get("length") or self.info.get("duration")
 
-    @property
+    @cached_property
     def album(self):
         """Returns album name of audio file"""
 
@@ -111,7 +196,7 @@ class File:
             raise RuntimeError("Only audio files can have album names")
         return self.info.get("album")
 
-    @property
+    @cached_property
     def artist(self):
         """Returns artist name of audio file"""
 
@@ -119,7 +204,7 @@ class File:
             raise RuntimeError("Only audio files can have artist names")
         return self.info.get("artist")
 
-    @property
+    @cached_property
     def codec(self):
         """Returns codec type of media file"""
 
@@ -127,7 +212,7 @@ class File:
             raise RuntimeError("Only audio and video files can have codecs")
         return self.info.get("codec")
 
-    @property
+    @cached_property
     def title(self):
         """Returns title of media file"""
 
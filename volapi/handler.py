@@ -2,12 +2,13 @@ import logging
 import warnings
 import pprint
 
+from concurrent.futures import Future
 from functools import partial
+from itertools import count
 
 
 from .file import File
 from .chat import ChatMessage
-from .auxo import ARBITRATOR
 
 LOGGER = logging.getLogger(__name__)
 
@@ -23,52 +24,97 @@ GENERICS = [
 
 
 class Handler:
+    __slots__ = (
+        "conn",
+        "room",
+        "__callbacks",
+        "__cid",
+        "__dispatch",
+        "__int_dispatch",
+    )
+
     def __init__(self, conn):
         self.conn = conn
         self.room = conn.room
-        self.__head = "_handle_"
         self.__callbacks = {}
-        self.__cid = 0
+        self.__cid = count()
+        head = "_handle_"
+        self.__dispatch = {
+            name[len(head) :]: getattr(self, name)
+            for name in dir(self)
+            if name.startswith(head)
+            and name not in ("_handle_generic", "_handle_unhandled")
+        }
         for g in GENERICS:
-            setattr(self, f"{self.__head}{g}", partial(self._handle_generic, g))
+            self.__dispatch[g] = partial(self._handle_generic, g)
+        # error codes arrive as ints, look them up without converting
+        self.__int_dispatch = {
+            int(k): v for k, v in self.__dispatch.items() if k.isdigit()
+        }
 
     def add_data(self, rawdata):
         """Add data to given room's state"""
 
+        dispatch = self.__dispatch
+        int_dispatch = self.__int_dispatch
+        unhandled = self._handle_unhandled
+        room, conn = self.room, self.conn
+        enqueue_data = conn.enqueue_data
+        chat_from_data = ChatMessage.from_data
         for data in rawdata:
-            try:
-                item = data[0]
-                if item[0] == 2:
-                    # Flush messages but we got nothing to flush
-                    continue
-                if item[0] != 0:
-                    warnings.warn(f"Unknown message type '{item[0]}'", Warning)
-                    continue
-                item = item[1]
-                # convert target to string because error codes are ints
-                target = str(item[0])
-                try:
-                    data = item[1]
-                except IndexError:
-                    data = {}
+            if not data or not data[0]:
+                LOGGER.warning("Wrongly constructed message received: %r", data)
+                continue
+            item = data[0]
+            if item[0] == 2:
+                # Flush messages but we got nothing to flush
+                continue
+            if item[0] != 0:
+                warnings.warn(f"Unknown message type '{item[0]}'", Warning)
+                continue
+            if len(item) < 2 or not item[1]:
+                LOGGER.warning("Wrongly constructed message received: %r", data)
+                continue
+            item = item[1]
+            target = item[0]
+            data = item[1] if len(item) > 1 else {}
+            if target == "chat":
+                # chat is the bulk of the traffic, so it skips the dispatch
                 try:
-                    method = getattr(self, f"{self.__head}{target}")
-                    method(data)
+                    enqueue_data("chat", chat_from_data(room, conn, data))
                 except AttributeError:
-                    self._handle_unhandled(target, data)
-            except IndexError:
+                    unhandled(target, data)
+                except (IndexError, KeyError):
+                    LOGGER.warning("Wrongly constructed message received: %r", data)
+                continue
+            if type(target) is int:
+                method = int_dispatch.get(target)
+            else:
+                method = dispatch.get(target)
+            if method is None:
+                # convert target to string because error codes are ints
+                unhandled(str(target), data)
+                continue
+            try:
+                method(data)
+            except AttributeError:
+                # handlers trip over room properties we cannot set
+                unhandled(str(target), data)
+            except (IndexError, KeyError):
+                # malformed payloads must not take the whole connection down
                 LOGGER.warning("Wrongly constructed message received: %r", data)
 
-        self.conn.process_queues()
+        conn.process_queues()
 
     def register_callback(self):
         """Register callback that we will have to wait for"""
 
-        cid = str(self.__cid)
-        self.__cid += 1
-        event = ARBITRATOR.loop.create_future()
-        self.__callbacks[cid] = event
-        return cid, event
+        cid = str(next(self.__cid))
+        future = Future()
+        self.__callbacks[cid] = future
+        # do not keep callbacks around lain never answered
+        future.add_done_callback(lambda _: self.__callbacks.pop(cid, None))
+        return cid, future
 
     def _handle_generic(self, target, data):
         """Handle generic notifications"""
@@ -100,18 +146,21 @@ class Handler:
 
         cb_id = data.get("id")
         args = data.get("args")
-        event = self.__callbacks.pop(cb_id, None)
-        if not event:
+        future = self.__callbacks.pop(cb_id, None)
+        if not future:
             return
         if not args:
-            event.cancel()
+            future.cancel()
+            return
+        if not future.set_running_or_notify_cancel():
+            # the caller gave up already
             return
         err, info = args
         if err is None:
-            event.set_result(info)
+            future.set_result(info)
         else:
             LOGGER.warning("Callback returned error of %s", str(err))
-            event.set_result(err)
+            future.set_result(err)
 
     def _handle_userCount(self, data):
         """Handle user count changes"""
@@ -122,19 +171,21 @@ class Handler:
     def _handle_userInfo(self, data):
         """Handle user information"""
 
+        items = []
         for k, v in data.items():
             if k == "nick":
                 if v == "None":
                     v = "Volaphile"
                 setattr(self.room.user, k, v)
-                self.conn.enqueue_data(k, self.room.user.nick)
+                items.append((k, self.room.user.nick))
             elif k != "profile":
                 if not hasattr(self.room, k):
                     warnings.warn(f"Skipping unset property {k}", ResourceWarning)
                     continue
                 setattr(self.room, k, v)
-                self.conn.enqueue_data(k, getattr(self.room, k))
-            self.conn.enqueue_data("user_info", {k: v})
+                items.append((k, getattr(self.room, k)))
+            items.append(("user_info", {k: v}))
+        self.conn.enqueue_many(items)
 
     def _handle_removeMessages(self, data):
         """Handle mods purging stuff"""
@@ -162,26 +213,36 @@ class Handler:
 
         initial = data.get("set", False)
         files = data["files"]
+        room, conn = self.room, self.conn
+        known = room.filedict
+        new_files = []
         for f in files:
             try:
-                fobj = File(
-                    self.room,
-                    self.conn,
-                    f[0],
-                    f[1],
-                    type=f[2],
-                    size=f[3],
-                    expire_time=int(f[4]) / 1000,
-                    uploader=f[6].get("nick") or f[6].get("user"),
-                )
-                self.room.filedict = fobj.fid, fobj
+                fid = f[0]
+                fobj = known.get(fid)
+                # keep files we already fetched the full metadata of,
+                # lain resends the whole list when we reconnect
+                if fobj is None or not fobj.updated:
+                    meta = f[6]
+                    fobj = File(
+                        room,
+                        conn,
+                        fid,
+                        f[1],
+                        type=f[2],
+                        size=f[3],
+                        expire_time=int(f[4]) / 1000,
+                        uploader=meta.get("nick") or meta.get("user"),
+                    )
+                    room.filedict = fid, fobj
                 if not initial:
-                    self.conn.enqueue_data("file", fobj)
+                    new_files.append(("file", fobj))
             except Exception:
                 LOGGER.exception("bad file")
                 pprint.pprint(f)
+        conn.enqueue_many(new_files)
         if initial:
-            self.conn.enqueue_data("initial_files", self.room.filedict.values())
+            conn.enqueue_data("initial_files", list(known.values()))
 
     def _handle_delete_file(self, data):
         """Handle files being removed"""
@@ -191,13 +252,6 @@ class Handler:
             self.room.filedict = data, None
             self.conn.enqueue_data("delete_file", file)
 
-    def _handle_chat(self, data):
-        """Handle chat messages"""
-
-        self.conn.enqueue_data(
-            "chat", ChatMessage.from_data(self.room, self.conn, data)
-        )
-
     def _handle_changed_config(self, change):
         """Handle configuration changes"""
 
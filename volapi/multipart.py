@@ -5,11 +5,13 @@ Copyright © 2015 RealDolos
 See LICENSE
 """
 
+import mmap
 import os
+import string
 import sys
-import uuid
 
-from io import BytesIO
+from stat import S_ISREG
+from collections import deque
 from collections.abc import Mapping
 from urllib.parse import quote
 
@@ -19,10 +21,14 @@ except ImportError:
     import json
 
 
+# Characters quote leaves alone with safe="/ "
+SAFE_HEADER_CHARS = frozenset(string.ascii_letters + string.digits + "_.-~/ ")
+
+
 def generate_boundary():
     """Generates a boundary string to be used for multipart/form-data"""
 
-    return uuid.uuid4().hex
+    return os.urandom(16).hex()
 
 
 def escape_header(val):
@@ -30,20 +36,30 @@ def escape_header(val):
 
     if val is None:
         return None
+    if SAFE_HEADER_CHARS.issuperset(val):
+        # quote would not change anything
+        return val
     try:
         return quote(val, encoding="ascii", safe="/ ")
     except ValueError:
         return "utf-8''" + quote(val, encoding="utf-8", safe="/ ")
 
 
-def make_streams(name, value, boundary, encoding):
-    """Generates one or more streams for each name, value pair"""
+def make_streams(name, value, boundary, encoding, prefix=None):
+    """Generates one or more streams for each name, value pair.
+    Headers and in-memory values are returned as plain bytes, file-like
+    values are returned as they are, wrapped by their headers.
+    `prefix` may hold the already encoded boundary line."""
 
     filename = None
     mime = None
 
     # user passed in a special dict.
-    if isinstance(value, Mapping) and "name" in value and "value" in value:
+    if (
+        (type(value) is dict or isinstance(value, Mapping))
+        and "name" in value
+        and "value" in value
+    ):
         filename = value["name"]
         try:
             mime = value["mime"]
@@ -60,37 +76,65 @@ def make_streams(name, value, boundary, encoding):
 
     name, filename, mime = [escape_header(v) for v in (name, filename, mime)]
 
-    stream = BytesIO()
-    stream.write("--{}\r\n".format(boundary).encode(encoding))
+    parts = [prefix or "--{}\r\n".format(boundary).encode(encoding)]
     if not filename:
-        stream.write(
-            'Content-Disposition: form-data; name="{}"\r\n'.format(name).encode(
-                encoding
-            )
+        parts.append(
+            b'Content-Disposition: form-data; name="%s"\r\n' % name.encode(encoding)
         )
     else:
-        stream.write(
-            'Content-Disposition: form-data; name="{}"; filename="{}"\r\n'.format(
-                name, filename
-            ).encode(encoding)
+        parts.append(
+            b'Content-Disposition: form-data; name="%s"; filename="%s"\r\n'
+            % (name.encode(encoding), filename.encode(encoding))
         )
         if mime:
-            stream.write("Content-Type: {}\r\n".format(mime).encode(encoding))
-    stream.write(b"\r\n")
+            parts.append(b"Content-Type: %s\r\n" % mime.encode(encoding))
+    parts.append(b"\r\n")
 
     if hasattr(value, "read"):
-        stream.seek(0)
-        return stream, value, BytesIO("\r\n".encode(encoding))
+        return b"".join(parts), value, b"\r\n"
 
     # not a file-like object, encode headers and value in one go
     value = value if isinstance(value, (str, bytes)) else json.dumps(value)
     if isinstance(value, bytes):
-        stream.write(value)
+        parts.append(value)
     else:
-        stream.write(value.encode(encoding))
-    stream.write(b"\r\n")
-    stream.seek(0)
-    return (stream,)
+        parts.append(value.encode(encoding))
+    parts.append(b"\r\n")
+    return (b"".join(parts),)
+
+
+def stream_len(stream):
+    """Number of bytes left in a stream"""
+
+    if isinstance(stream, bytes):
+        return len(stream)
+    try:
+        stat = os.fstat(stream.fileno())
+    except (AttributeError, OSError, ValueError):
+        pass
+    else:
+        # real files know their size, no need to seek around
+        if S_ISREG(stat.st_mode):
+            return stat.st_size - stream.tell()
+    cur = stream.tell()
+    try:
+        stream.seek(0, 2)
+        return stream.tell() - cur
+    finally:
+        stream.seek(cur)
+
+
+def map_stream(stream):
+    """Maps a regular file into memory, or returns None if it cannot be"""
+
+    try:
+        fileno = stream.fileno()
+        if not S_ISREG(os.fstat(fileno).st_mode):
+            return None
+        return mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+    except (AttributeError, OSError, ValueError):
+        # no fileno, empty files and the like
+        return None
 
 
 class Data:
@@ -111,7 +155,8 @@ class Data:
     Data objects must be iterated over (streamed). Each iteration result
     will contain at most blocksize bytes. This enables Data objects to
     encode multipart/form-data requests without having to read all data
-    into memory at once
+    into memory at once. Bodies without file-like objects are in memory
+    already and will be produced in one go.
     """
 
     def __init__(
@@ -119,18 +164,22 @@ class Data:
     ):
         self.encoding = encoding or "utf-8"
         self.boundary = generate_boundary()
-        self.streams = []
+        self.streams = deque()
         self.callback = callback or None
         self.blocksize = blocksize
         self.logical_offset = logical_offset
+        self.__len = None
+        self.__headers = None
         if not self.blocksize or self.blocksize <= 0:
-            self.blocksize = 1 << 17
+            self.blocksize = 1 << 20
 
+        prefix = "--{}\r\n".format(self.boundary).encode(encoding)
         for name, value in values.items():
-            self.streams.extend(make_streams(name, value, self.boundary, encoding))
-        self.streams.append(
-            BytesIO("--{}--\r\n".format(self.boundary).encode(encoding))
-        )
+            self.streams.extend(
+                make_streams(name, value, self.boundary, encoding, prefix)
+            )
+        self.streams.append("--{}--\r\n".format(self.boundary).encode(encoding))
+        self.__in_memory = all(isinstance(s, bytes) for s in self.streams)
 
     @property
     def len(self):
@@ -139,63 +188,105 @@ class Data:
         # requests checks __len__, then len
         # Since we cannot implement __len__ because python 32-bit uses 32-bit
         # sizes, we implement this instead.
-        def stream_len(stream):
-            """Stream length"""
-            cur = stream.tell()
-            try:
-                stream.seek(0, 2)
-                return stream.tell() - cur
-            finally:
-                stream.seek(cur)
-
-        return sum(stream_len(s) for s in self.streams)
+        # Streams are not touched before iterating, so compute it only once
+        if self.__len is None:
+            self.__len = sum(stream_len(s) for s in self.streams)
+        return self.__len
 
     @property
     def headers(self):
         """All headers needed to make a request"""
-        return {
-            "Content-Type": ("multipart/form-data; boundary={}".format(self.boundary)),
-            "Content-Length": str(self.len),
-            "Content-Encoding": self.encoding,
-        }
+        if self.__headers is None:
+            self.__headers = {
+                "Content-Type": (
+                    "multipart/form-data; boundary={}".format(self.boundary)
+                ),
+                "Content-Length": str(self.len),
+                "Content-Encoding": self.encoding,
+            }
+        return self.__headers
 
     def __iter__(self):
         with self:
             total = None
             if self.callback:
                 total = self.len
+            if self.__in_memory:
+                # nothing to stream, so do not bother chunking it up
+                body = b"".join(self.streams)
+                self.streams.clear()
+                yield body
+                if self.callback:
+                    self.callback(
+                        self.logical_offset + len(body), self.logical_offset + total
+                    )
+                return
             pos = 0
-            remainder = self.blocksize
-            buf = BytesIO()
-            stream = self.streams.pop(0)
-            while stream:
-                with stream:
-                    while remainder:
-                        cur = stream.read(remainder)
-                        if not cur:
-                            break
-                        buf.write(cur)
-                        remainder -= len(cur)
-                        if not remainder:
-                            val = buf.getvalue()
-                            yield val
-                            if self.callback:
-                                pos += len(val)
-                                self.callback(
-                                    self.logical_offset + pos,
-                                    self.logical_offset + total,
-                                )
-                            remainder = self.blocksize
-                            buf = BytesIO()
+            blocksize = self.blocksize
+            # single staging buffer that is reused for every block
+            buf = bytearray(blocksize)
+            view = memoryview(buf)
+            filled = 0
+            while self.streams:
+                stream = self.streams.popleft()
+                is_bytes = isinstance(stream, bytes)
+                mapped = None if is_bytes else map_stream(stream)
+                if is_bytes:
+                    part = memoryview(stream)
+                elif mapped is not None:
+                    # copy straight from the page cache instead of read()ing
+                    part = memoryview(mapped)[stream.tell() :]
+                else:
+                    part = None
+                readinto = part is None and getattr(stream, "readinto", None)
+                offset = 0
                 try:
-                    stream = self.streams.pop(0)
-                except IndexError:
-                    break
-
-            last = buf.getvalue()
-            if not last:
+                    while True:
+                        if part is not None and not filled and (
+                            len(part) - offset >= blocksize
+                        ):
+                            # whole blocks skip the staging buffer, one copy less
+                            end = offset + blocksize
+                            val = bytes(part[offset:end])
+                            offset = end
+                        else:
+                            want = blocksize - filled
+                            if part is not None:
+                                count = min(want, len(part) - offset)
+                                end = offset + count
+                                view[filled : filled + count] = part[offset:end]
+                                offset = end
+                            elif readinto:
+                                count = readinto(view[filled:]) or 0
+                            else:
+                                cur = stream.read(want)
+                                count = len(cur)
+                                view[filled : filled + count] = cur
+                            if not count:
+                                break
+                            filled += count
+                            if filled != blocksize:
+                                continue
+                            val = bytes(buf)
+                            filled = 0
+                        yield val
+                        if self.callback:
+                            pos += len(val)
+                            self.callback(
+                                self.logical_offset + pos,
+                                self.logical_offset + total,
+                            )
+                finally:
+                    if mapped is not None:
+                        part.release()
+                        mapped.close()
+                    if not is_bytes:
+                        stream.close()
+
+            if not filled:
                 return
 
+            last = bytes(view[:filled])
             pos += len(last)
             yield last
             if self.callback:
@@ -209,12 +300,14 @@ class Data:
 
     def close(self):
         """Close multipart instance and all associated streams"""
+        streams = self.streams
         try:
-            for stream in self.streams:
-                if not stream.closed:
+            while streams:
+                stream = streams.popleft()
+                if not isinstance(stream, bytes) and not stream.closed:
                     stream.close()
         finally:
-            del self.streams[:]
+            streams.clear()
 
 
 if __name__ == "__main__":
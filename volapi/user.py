@@ -1,11 +1,25 @@
+import re
 import string
 
+from functools import lru_cache
+from threading import Event
+
+NICK_CHARS = frozenset(string.ascii_letters + string.digits)
+
+
+@lru_cache(maxsize=8)
+def nick_re(max_length):
+    """Returns a pattern matching a whole valid nick of up to max_length"""
+
+    return re.compile(rf"\A[A-Za-z0-9]{{3,{max_length}}}\Z")
+
 
 class User:
     """Used by Room. Currently not very useful by itself"""
 
     def __init__(self, nick, conn, max_len):
         self.__max_length = max_len
+        self.__has_nick = Event()
         if nick is None:
             self.nick = ""
         else:
@@ -15,6 +29,26 @@ class User:
         self.logged_in = False
         self.session = None
 
+    @property
+    def nick(self):
+        """Current nick, empty until the server assigned one"""
+
+        return self.__nick
+
+    @nick.setter
+    def nick(self, nick):
+        self.__nick = nick
+        if nick:
+            self.__has_nick.set()
+        else:
+            self.__has_nick.clear()
+
+    def wait_for_nick(self):
+        """Blocks until the user has a nick and returns it"""
+
+        self.__has_nick.wait()
+        return self.__nick
+
     def login(self, password):
         """Attempts to log in as the current user with given password"""
 
@@ -28,8 +62,8 @@ class User:
                 f"Login failed: {resp['error'].get('message') or resp['error']}"
             )
         self.session = resp["session"]
+        self.conn.cookies.set("session", self.session)
         self.conn.make_call("useSession", self.session)
-        self.conn.cookies.update({"session": self.session})
         self.logged_in = True
         return True
 
@@ -41,7 +75,7 @@ class User:
         cookie = other.session
         if not cookie:
             raise ValueError("Other room has no cookie")
-        self.conn.cookies.update({"session": cookie})
+        self.conn.cookies.set("session", cookie)
         self.session = cookie
         self.logged_in = True
         return True
@@ -86,18 +120,20 @@ class User:
         if "error" in resp:
             raise RuntimeError(f"{resp['error'].get('message') or resp['error']}")
 
+        self.conn.cookies.set("session", resp["session"])
         self.conn.make_call("useSession", resp["session"])
-        self.conn.cookies.update({"session": resp["session"]})
         self.logged_in = True
 
     def __verify_username(self, username):
         """Raises an exception if the given username is not valid."""
 
+        if nick_re(self.__max_length).match(username):
+            return
         if len(username) > self.__max_length or len(username) < 3:
             raise ValueError(
                 f"Username must be between 3 and {self.__max_length} characters."
             )
-        if any(c not in string.ascii_letters + string.digits for c in username):
+        if not NICK_CHARS.issuperset(username):
             raise ValueError("Usernames can only contain alphanumeric characters.")
 
     def __repr__(self):
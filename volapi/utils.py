@@ -5,15 +5,28 @@ See LICENSE
 """
 
 import random
+import re
 import string
 
 from contextlib import contextmanager
+from html import unescape
 from html.parser import HTMLParser
+from io import StringIO
+
+COMPACT_SEPARATORS = (",", ":")
 
 try:
-    import orjson as json
+    from orjson import dumps, loads
 except ImportError:
-    import json
+    from functools import partial
+    from json import dumps, loads
+
+    dumps = partial(dumps, separators=COMPACT_SEPARATORS)
+
+
+ID_CHARS = string.ascii_letters + string.digits
+SYSTEM_RANDOM = random.SystemRandom()
+TAG_RE = re.compile(r"""<[a-zA-Z/!?](?:"[^"]*"|'[^']*'|[^'">])*>""")
 
 
 class MLStripper(HTMLParser):
@@ -21,68 +34,84 @@ class MLStripper(HTMLParser):
 
     def __init__(self):
         super().__init__()
-        self.fed = []
+        self.fed = StringIO()
 
     def handle_data(self, data):
-        self.fed.append(data)
+        self.fed.write(data)
 
     def get_data(self):
         """Gets the non-HTML data from text that was fed in"""
 
-        return "".join(self.fed)
+        return self.fed.getvalue()
 
 
 def html_to_text(html):
     """Strips HTML tags from given text and returns it."""
 
-    stripper = MLStripper()
-    stripper.feed(html)
-    return stripper.get_data()
+    if "<" not in html and "&" not in html:
+        return html
+    if "<!--" in html:
+        # comments may contain ">", leave those to the real parser
+        stripper = MLStripper()
+        stripper.feed(html)
+        return stripper.get_data()
+    return unescape(TAG_RE.sub("", html))
 
 
-def random_id(length):
-    """Generates a random ID of given length"""
+def aslist(value):
+    """Wraps a single string in a tuple, passes other iterables as they are"""
 
-    def char():
-        """Generate single random char"""
+    if isinstance(value, str):
+        return (value,)
+    return value or ()
 
-        return random.choice(string.ascii_letters + string.digits)
 
-    return "".join(char() for _ in range(length))
+def random_id(length):
+    """Generates a random ID of given length"""
+
+    return "".join(SYSTEM_RANDOM.choices(ID_CHARS, k=length))
 
 
 def to_json(obj):
     """Create a compact JSON string from an object"""
 
-    byte_dump = json.dumps(obj)
+    byte_dump = dumps(obj)
     if isinstance(byte_dump, bytes):
         return byte_dump
     return byte_dump.encode("utf8")
 
 
 def from_json(string):
-    """Create a Python object from a JSON string"""
+    """Create a Python object from a JSON string.
+    Accepts bytes as well, which orjson parses without decoding first."""
+
+    return loads(string)
+
+
+class NoCloseProxy:
+    """Forwards everything to the wrapped object except close"""
 
-    return json.loads(string)
+    __slots__ = ("__closable",)
+
+    def __init__(self, closable):
+        self.__closable = closable
+
+    def __getattr__(self, name):
+        return getattr(self.__closable, name)
+
+    def close(self):
+        """ No op """
 
 
 @contextmanager
 def delayed_close(closable):
     """Delay close until this contextmanager dies"""
 
-    close = getattr(closable, "close", None)
-    if close:
-        # we do not want the library to close file in case we need to
-        # resume, hence make close a no-op
-        # pylint: disable=unused-argument
-        def replacement_close(*args, **kw):
-            """ No op """
-
-        # pylint: enable=unused-argument
-        setattr(closable, "close", replacement_close)
+    # we do not want the library to close file in case we need to
+    # resume, hence hand out a proxy with a no-op close
     try:
-        yield closable
+        yield NoCloseProxy(closable)
     finally:
+        close = getattr(closable, "close", None)
         if close:
-            setattr(closable, "close", close)
-            closable.close()
+            close()
@@ -22,21 +22,25 @@ import os
 import re
 import time
 
-from collections import OrderedDict
-from collections import defaultdict
 from contextlib import suppress
+from itertools import islice
+from types import MappingProxyType
 from threading import get_ident as get_thread_ident
-from threading import Barrier, RLock, BrokenBarrierError
+from threading import Barrier, Event, Lock, BrokenBarrierError
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import CancelledError as FutureCancelledError
 from concurrent.futures import TimeoutError as FutureTimeoutError
 
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from .auxo import ARBITRATOR, Listeners, Protocol
 from .handler import Handler
 from .config import Config
 from .user import User
 from .multipart import Data
-from .utils import delayed_close, random_id, to_json, from_json
+from .utils import aslist, delayed_close, random_id, to_json, from_json
 from .constants import (
     __version__,
     MAX_UNACKED,
@@ -44,9 +48,27 @@ from .constants import (
     BASE_REST_URL,
     BASE_WS_URL,
     REST,
+    PING,
+    MESSAGE,
+    UPGRADE,
 )
 
 LOGGER = logging.getLogger(__name__)
+ROOM_NAME_RE = re.compile(r"r/([^/]+)$")
+
+# defaults for banUser/unbanUser, callers may override any of them
+BAN_OPTIONS = {"ban": False, "hellban": False, "mute": False, "purgeFiles": False}
+UNBAN_OPTIONS = {"ban": True, "hellban": True, "mute": True, "timeout": True}
+
+# shared by all rooms, so concurrent uploads stay bounded
+UPLOAD_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="volapi-upload")
+
+# lain's frontends hiccup now and then, retry idempotent requests on those.
+# Retry's default allowed methods leave out POST, so status and read errors
+# are never retried for uploads, upload_file resumes those itself instead
+REST_RETRIES = Retry(
+    total=3, backoff_factor=0.3, status_forcelist=(502, 503, 504), raise_on_status=False
+)
 
 
 class Connection(requests.Session):
@@ -58,17 +80,25 @@ class Connection(requests.Session):
 
         self.room = room
         self.exception = None
+        self.__failed = Event()
 
         self.__lastping = self.__lastpong = 0
+        # set by on_close, so the ping loop does not sleep through a close
+        self.__closing = None
 
         agent = f"Volafile-API/{__version__}"
 
         self.headers.update({"User-Agent": agent})
-        self.cookies.update({"allow-download": "1"})
+        # requests merges these into a new dict, so they are never modified
+        self.__rest_headers = {"Origin": BASE_URL, "Referer": room.url}
+        self.cookies.set("allow-download", "1")
+        # the session pools connections already, this only adds the retries
+        self.mount("https://", HTTPAdapter(max_retries=REST_RETRIES))
 
-        self.lock = RLock()
+        self.lock = Lock()
         self.__conn_barrier = Barrier(2, timeout=5)
-        self.listeners = defaultdict(Listeners)
+        # copy-on-write, readers on the loop thread do not need the lock
+        self.listeners = {}
         self.must_process = False
         self.__queues_enabled = True
         self.__called_close_once = False
@@ -76,6 +106,7 @@ class Connection(requests.Session):
         self.proto = Protocol(self)
         self.handler = Handler(self)
         self.last_ack = self.proto.max_id
+        self.__frames = []
 
     def connect(self, username, checksum, password=None, key=None):
         """Connect to websocket through asyncio http interface"""
@@ -113,53 +144,61 @@ class Connection(requests.Session):
     def send_message(self, payload):
         """Send a message"""
 
+        if not isinstance(payload, bytes):
+            payload = payload.encode("utf-8")
         ARBITRATOR.send_message(self.proto, payload)
 
+    def __take_ack(self):
+        """Returns the ack payload, or None when everything is acked already"""
+
+        max_id = self.proto.max_id
+        if self.last_ack == max_id:
+            return None
+        LOGGER.debug("ack (%d)", max_id)
+        self.last_ack = max_id
+        return MESSAGE + to_json([max_id])
+
     def send_ack(self):
         """Send an ack message"""
 
-        if self.last_ack == self.proto.max_id:
-            return
-        LOGGER.debug("ack (%d)", self.proto.max_id)
-        self.last_ack = self.proto.max_id
-        self.send_message(b"4" + to_json([self.proto.max_id]))
+        ack = self.__take_ack()
+        if ack:
+            ARBITRATOR.send_message(self.proto, ack)
 
     def make_call(self, fun, *args):
         """Makes a regular API call"""
 
+        proto = self.proto
+        send_count = proto.send_count
         obj = {"fn": fun, "args": list(args)}
-        obj = [self.proto.max_id, [[0, ["call", obj]], self.proto.send_count]]
-        self.send_message(b"4" + to_json(obj))
-        self.proto.send_count += 1
+        obj = [proto.max_id, [[0, ["call", obj]], send_count]]
+        proto.send_count = send_count + 1
+        ARBITRATOR.send_message(proto, MESSAGE + to_json(obj))
 
     def make_call_with_cb(self, fun, *args):
         """Makes an API call with a callback to wait for"""
 
-        async def call_and_wait():
-            cid, event = self.handler.register_callback()
-            argscp = list(args)
-            argscp.append(cid)
-            self.make_call(fun, *argscp)
-            return await event
-
-        return asyncio.run_coroutine_threadsafe(call_and_wait(), ARBITRATOR.loop)
+        cid, future = self.handler.register_callback()
+        self.make_call(fun, *args, cid)
+        return future
 
     def make_api_call(self, call, params, heads=None, server=None):
         """Make a REST API call"""
 
-        heads = heads or {}
         server = f"https://{server}{REST}" if server else BASE_REST_URL
         if not isinstance(params, dict):
             raise ValueError("params argument must be a dictionary")
-        headers = {"Origin": BASE_URL, "Referer": self.room.url}
-        headers.update(heads)
-        kw = dict(params=params, headers=headers)
-        return from_json(self.get(f"{server}{call}", **kw).text)
+        headers = self.__rest_headers
+        if heads:
+            headers = {**headers, **heads}
+        resp = self.get(f"{server}{call}", params=params, headers=headers)
+        return from_json(resp.content)
 
     def reraise(self, ex):
         """Reraise an exception passed by the event thread"""
 
         self.exception = ex
+        self.__failed.set()
         self.process_queues(forced=True)
 
     def close(self):
@@ -169,14 +208,16 @@ class Connection(requests.Session):
             with self.lock:
                 self.__called_close_once = True
             if self.connected:
-                obj = [self.proto.max_id, [[2], self.proto.send_count]]
-                self.send_message(b"4" + to_json(obj))
+                proto = self.proto
+                obj = [proto.max_id, [[2], proto.send_count]]
+                ARBITRATOR.send_message(proto, MESSAGE + to_json(obj))
                 with ARBITRATOR.condition:
                     while self.connected:
                         if not ARBITRATOR.condition.wait(timeout=2):
                             break
                 ARBITRATOR.close(self.proto)
-            self.listeners.clear()
+            self.listeners = {}
+            ARBITRATOR.drop_ready(self)
             super().close()
             if hasattr(self, "room"):
                 del self.room
@@ -193,14 +234,20 @@ class Connection(requests.Session):
         """DingDongmaster the connection is open"""
 
         self.__ensure_barrier()
+        self.__closing = closing = asyncio.Event()
         while self.connected:
             try:
                 if self.__lastping > self.__lastpong:
                     raise IOError("Last ping remained unanswered")
-                self.send_message("2")
-                self.send_ack()
-                self.__lastping = time.time()
-                await asyncio.sleep(self.ping_interval)
+                # ping and ack go out together
+                payloads = [PING]
+                ack = self.__take_ack()
+                if ack:
+                    payloads.append(ack)
+                ARBITRATOR.send_messages(self.proto, payloads)
+                self.__lastping = time.monotonic()
+                with suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(closing.wait(), self.ping_interval)
             except Exception as ex:
                 LOGGER.exception("Failed to ping")
                 try:
@@ -215,8 +262,25 @@ class Connection(requests.Session):
         """DingDongmaster the connection is gone"""
 
         self.__ensure_barrier()
+        if self.__closing is not None:
+            self.__closing.set()
         return None
 
+    def __flush_frames(self):
+        """Passes the buffered frame items to the handler"""
+
+        items = self.__frames
+        if not items:
+            return
+        self.__frames = []
+        if not hasattr(self, "room"):
+            LOGGER.debug("dropping out of bounds messages [%r]", items)
+            return
+        try:
+            self.handler.add_data(items)
+        except Exception as ex:
+            self.reraise(ex)
+
     def _on_frame(self, data):
         if not hasattr(self, "room"):
             LOGGER.debug("received out of bounds message [%r]", data)
@@ -224,26 +288,28 @@ class Connection(requests.Session):
         LOGGER.debug("received message %r", data)
         if not isinstance(data, list):
             self.proto.session = data["session"]
-        elif isinstance(data, list) and len(data) > 1:
-            data = data[1:]
+        elif len(data) > 1:
+            # the first item is the frame header, the rest are messages
             last_ack = int(data[-1][-1])
             self.proto.max_id = last_ack
             if last_ack > self.proto.max_id + MAX_UNACKED:
                 LOGGER.debug("needing to ack (%d/%d)", last_ack, self.proto.max_id)
                 self.send_ack()
-            self.handler.add_data(data)
+            # hand everything that arrived in this loop iteration over at once
+            if not self.__frames:
+                ARBITRATOR.loop.call_soon(self.__flush_frames)
+            self.__frames.extend(islice(data, 1, None))
         elif data == [2]:
             LOGGER.debug("Server send close message")
+            self.__flush_frames()
             self.room.close()
         elif data == [0]:
             LOGGER.warning("Some IO Error, maybe reconnect after it?")
+            self.__flush_frames()
             raise IOError("Forced disconnect")
-        elif isinstance(data, list):
+        else:
             # wait for some gibberish connection end handshake data??
             ARBITRATOR.awaken()
-        # not really handled further
-        else:
-            LOGGER.warning("unhandled message frame type %r", data)
 
     def on_message(self, new_data):
         """Processes incoming messages according to engine-io rules"""
@@ -251,34 +317,34 @@ class Connection(requests.Session):
 
         LOGGER.debug("new frame [%r]", new_data)
         try:
-            what = int(new_data[0])
-            data = new_data[1:]
-            data = data and from_json(data)
-            if what == 0:
-                self.ping_interval = float(data["pingInterval"]) / 1000
-                LOGGER.debug("adjusted ping interval")
-                return
-
-            if what == 1:
-                LOGGER.debug("received close")
-                self.reraise(IOError("Connection closed remotely"))
+            # the packet type is a single ascii digit, no need to parse it
+            what = new_data[0] - 48
+            if what == 4:
+                self._on_frame(from_json(new_data[1:]))
                 return
 
             if what == 3:
-                self.__lastpong = time.time()
+                self.__lastpong = time.monotonic()
                 LOGGER.debug("received a pong")
                 return
 
-            if what == 4:
-                self._on_frame(data)
-                return
-
             if what == 6:
                 LOGGER.debug("received noop")
-                self.send_message("5")
+                ARBITRATOR.send_message(self.proto, UPGRADE)
+                return
+
+            if what == 0:
+                data = from_json(new_data[1:])
+                self.ping_interval = float(data["pingInterval"]) / 1000
+                LOGGER.debug("adjusted ping interval")
                 return
 
-            LOGGER.debug("unhandled message: [%d] [%r]", what, data)
+            if what == 1:
+                LOGGER.debug("received close")
+                self.reraise(IOError("Connection closed remotely"))
+                return
+
+            LOGGER.debug("unhandled message: [%d] [%r]", what, new_data[1:])
         except Exception as ex:
             self.reraise(ex)
 
@@ -288,7 +354,7 @@ class Connection(requests.Session):
 
         if not self.connected:
             # wait for errors set by reraise method
-            time.sleep(1)
+            self.__failed.wait(timeout=1)
             if self.exception:
                 # pylint: disable=raising-bad-type
                 raise self.exception
@@ -296,7 +362,10 @@ class Connection(requests.Session):
 
         thread = get_thread_ident()
         with self.lock:
-            listener = self.listeners[thread]
+            listener = self.listeners.get(thread)
+            if listener is None:
+                listener = Listeners()
+                self.listeners = {**self.listeners, thread: listener}
         listener.add(event_type, callback)
         # use "initial_files" event to listen for whole filelist on room join
         self.process_queues()
@@ -304,11 +373,22 @@ class Connection(requests.Session):
     def enqueue_data(self, event_type, data):
         """Enqueue a data item for specific event type"""
 
-        with self.lock:
-            listeners = self.listeners.values()
-            for listener in listeners:
-                listener.enqueue(event_type, data)
-                self.must_process = True
+        listeners = self.listeners
+        if not listeners:
+            return
+        for listener in listeners.values():
+            listener.enqueue(event_type, data)
+        self.must_process = True
+
+    def enqueue_many(self, items):
+        """Enqueue multiple (event type, data) items in one go"""
+
+        listeners = self.listeners
+        if not items or not listeners:
+            return
+        for listener in listeners.values():
+            listener.enqueue_many(items)
+        self.must_process = True
 
     @property
     def queues_enabled(self):
@@ -326,19 +406,22 @@ class Connection(requests.Session):
     def process_queues(self, forced=False):
         """Process queues if any have data queued"""
 
+        if not forced and not self.listeners:
+            # nobody to wake up, and do not bother taking the lock either
+            return
         with self.lock:
             if (not forced and not self.must_process) or not self.queues_enabled:
                 return
             self.must_process = False
+        ARBITRATOR.mark_ready(self, self.listeners)
         ARBITRATOR.awaken()
 
     @property
-    def __listeners_for_thread(self):
-        """All Listeners for the current thread"""
+    def __listener_for_thread(self):
+        """Listeners of the current thread, or None"""
 
-        thread = get_thread_ident()
-        with self.lock:
-            return [l for tid, l in self.listeners.items() if tid == thread]
+        # a plain lookup, add_listener swaps in a new dict when inserting
+        return self.listeners.get(get_thread_ident())
 
     def validate_listeners(self):
         """Validates that some listeners are actually registered"""
@@ -347,17 +430,20 @@ class Connection(requests.Session):
             # pylint: disable=raising-bad-type
             raise self.exception
 
-        listeners = self.__listeners_for_thread
-        if not sum(len(l) for l in listeners):
+        listener = self.__listener_for_thread
+        if listener is None or not len(listener):
             raise ValueError("No active listeners")
 
     def listen(self):
         """Listen for changes in all registered listeners."""
 
         self.validate_listeners()
+        thread, conns = get_thread_ident(), (id(self),)
         with ARBITRATOR.condition:
             while self.connected:
                 ARBITRATOR.condition.wait()
+                # consume our marks, nobody else would for this thread
+                ARBITRATOR.take_ready(thread, conns)
                 if not self.run_queues():
                     break
 
@@ -367,8 +453,8 @@ class Connection(requests.Session):
         if self.exception:
             # pylint: disable=raising-bad-type
             raise self.exception
-        listeners = self.__listeners_for_thread
-        return sum(l.process() for l in listeners) > 0
+        listener = self.__listener_for_thread
+        return listener is not None and listener.process() > 0
 
 
 class Room:
@@ -393,9 +479,17 @@ class Room:
         self.key = key or ""
         self.admin = self.staff = self.owner = self.janitor = False
         self.__user_count = 0
-        self.__files = OrderedDict()
+        self.__files = {}
+        self.__files_view = MappingProxyType(self.__files)
+        # earliest expiry among the known files, nothing to scan for before
+        self.__next_expire = float("inf")
+        # guards __next_expire, which the loop and user threads both update
+        self.__expire_lock = Lock()
         self.__upload_count = 0
         self.__room_score = 0.0
+        # file ID -> [query future, number of callers waiting for it]
+        self.__pending_info = {}
+        self.__pending_info_lock = Lock()
 
         self.config = Config()
         self.conn = Connection(self)
@@ -458,7 +552,7 @@ class Room:
             room_resp.raise_for_status()
             url = room_resp.url
             try:
-                self.name = re.search(r"r/(.+?)$", url).group(1)
+                self.name = ROOM_NAME_RE.search(url).group(1)
             except Exception as ex:
                 raise IOError("Failed to create room") from ex
         params = {"room": self.name}
@@ -540,9 +634,28 @@ class Room:
     def __expire_files(self):
         """Because files are always unclean"""
 
-        self.__files = OrderedDict(
-            item for item in self.__files.items() if not item[1].expired
-        )
+        if time.time() < self.__next_expire:
+            return
+        files = self.__files
+        with self.__expire_lock:
+            # the loop thread and user threads may both be expiring files,
+            # so work on a snapshot and do not mind entries that are gone
+            for fid, file in list(files.items()):
+                if file.expired:
+                    files.pop(fid, None)
+            self.__next_expire = min(
+                (file.expire_time for file in list(files.values())),
+                default=float("inf"),
+            )
+
+    def __live_file(self, fid):
+        """File entry for the given ID, dropping it if it expired already"""
+
+        file = self.__files.get(fid)
+        if file is not None and file.expired:
+            self.__files.pop(fid, None)
+            return None
+        return file
 
     @property
     def files(self):
@@ -555,12 +668,11 @@ class Room:
 
     @property
     def filedict(self):
-        """Returns dict of File objects for this room.
-        Note: This will only reflect the files at the time
-        this method was called."""
+        """Returns a read-only mapping of file IDs to File objects for this room.
+        Use dict(room.filedict) for a snapshot that does not change."""
 
         self.__expire_files()
-        return self.__files
+        return self.__files_view
 
     @filedict.setter
     def filedict(self, kv):
@@ -569,7 +681,9 @@ class Room:
 
         k, v = kv
         if v is not None:
-            self.__files.update({k: v})
+            with self.__expire_lock:
+                self.__files[k] = v
+                self.__next_expire = min(self.__next_expire, v.expire_time)
         else:
             with suppress(KeyError):
                 del self.__files[k]
@@ -591,19 +705,17 @@ class Room:
             raise ValueError(
                 f"Chat message must be at most {self.config.max_message} characters."
             )
-        while not self.user.nick:
-            with ARBITRATOR.condition:
-                ARBITRATOR.condition.wait()
+        nick = self.user.wait_for_nick()
         if is_a:
             if not self.admin or not self.staff:
                 raise RuntimeError("Can't modchat if you're not a mod or trusted")
-            self.conn.make_call("command", self.user.nick, "a", msg)
+            self.conn.make_call("command", nick, "a", msg)
             return
         if is_me:
-            self.conn.make_call("command", self.user.nick, "me", msg)
+            self.conn.make_call("command", nick, "me", msg)
             return
 
-        self.conn.make_call("chat", self.user.nick, msg)
+        self.conn.make_call("chat", nick, msg)
 
     def upload_file(
         self,
@@ -640,11 +752,8 @@ class Room:
                 callback=callback,
             )
 
-            headers = {
-                "Origin": BASE_URL,
-                "Referer": self.url,
-                "Connection": "close",
-            }
+            # no "Connection: close", resume calls reuse the connection
+            headers = {"Origin": BASE_URL, "Referer": self.url}
             headers.update(files.headers)
 
             while True:
@@ -718,6 +827,12 @@ class Room:
                         continue  # another day, another try
             return file_id
 
+    def upload_file_async(self, filename, **kw):
+        """Uploads a file in the background, see upload_file for the arguments.
+        Returns a concurrent.futures.Future that resolves to the file's id."""
+
+        return UPLOAD_EXECUTOR.submit(self.upload_file, filename, **kw)
+
     def close(self):
         """Close connection to this room"""
         if hasattr(self, "conn"):
@@ -747,7 +862,9 @@ class Room:
     def clear(self):
         """Clears the cached information, if any."""
 
-        self.__files.clear()
+        with self.__expire_lock:
+            self.__files.clear()
+            self.__next_expire = float("inf")
 
     def fileinfo(self, fid):
         """Ask lain about what he knows about given file. If the given file
@@ -756,28 +873,104 @@ class Room:
 
         if not isinstance(fid, str):
             raise TypeError("Your file ID must be a string")
-        if fid in self.__files and self.__files[fid].updated:
-            return self.__files[fid]
+        file = self.__live_file(fid)
+        if file is not None and file.updated:
+            return file
+        return self.__wait_fileinfo(fid, self.__request_fileinfo(fid))
+
+    def fileinfo_batch(self, fids):
+        """Ask lain about multiple files at once. All queries are sent
+        before waiting for any answer, so this takes about as long as a
+        single `fileinfo` call. Files in the file dict get updated, so
+        reading their metadata later needs no further queries.
+        Returns a dict of file IDs to their info, or to the File instance
+        for files that were updated already."""
+
+        fids = list(dict.fromkeys(fids))
+        if any(not isinstance(fid, str) for fid in fids):
+            raise TypeError("Your file IDs must be strings")
+        infos = {}
+        queried = []
+        for fid in fids:
+            file = self.__live_file(fid)
+            if file is not None and file.updated:
+                infos[fid] = file
+            else:
+                queried.append(fid)
+        pending = {fid: self.__request_fileinfo(fid) for fid in queried}
+        try:
+            for fid in queried:
+                info = infos[fid] = self.__wait_fileinfo(fid, pending.pop(fid))
+                file = self.__files.get(fid)
+                if info and file is not None and not file.updated:
+                    file.fileupdate(info)
+            return infos
+        finally:
+            # after a failed wait, let go of the queries nobody waited for yet
+            for fid, future in pending.items():
+                self.__release_fileinfo(fid, future)
+
+    def __request_fileinfo(self, fid):
+        """Query info of given file, reusing the query for it that is
+        still in flight if there is one"""
+
+        with self.__pending_info_lock:
+            entry = self.__pending_info.get(fid)
+            if entry is not None:
+                entry[1] += 1
+                return entry[0]
+            future = self.conn.make_call_with_cb("getFileinfo", fid)
+            self.__pending_info[fid] = [future, 1]
+        # outside the lock, the callback runs right away if lain was quick
+        future.add_done_callback(lambda _: self.__forget_fileinfo(fid, future))
+        return future
+
+    def __forget_fileinfo(self, fid, future):
+        """Drops the finished query, unless a newer one took its place"""
+
+        with self.__pending_info_lock:
+            entry = self.__pending_info.get(fid)
+            if entry is not None and entry[0] is future:
+                del self.__pending_info[fid]
+
+    def __release_fileinfo(self, fid, future):
+        """Stops waiting for a query, cancelling it once nobody waits anymore"""
+
+        with self.__pending_info_lock:
+            entry = self.__pending_info.get(fid)
+            if entry is None or entry[0] is not future:
+                # done already
+                return
+            entry[1] -= 1
+            if entry[1] > 0:
+                return
+            # new callers must not pick up the query we are about to cancel
+            del self.__pending_info[fid]
+        future.cancel()
+
+    def __wait_fileinfo(self, fid, future):
+        """Wait for the answer of a file info query"""
+
         try:
-            info = self.conn.make_call_with_cb("getFileinfo", fid).result(5)
+            info = future.result(5)
             if not info:
                 warnings.warn(
                     f"Your query for file with ID: '{fid}' failed.", RuntimeWarning
                 )
-        except (FutureTimeoutError, asyncio.CancelledError) as ex:
+        except (FutureTimeoutError, FutureCancelledError) as ex:
             raise ValueError(
                 "lain didn't produce a callback!\n"
                 "Are you sure your query wasn't malformed?"
             ) from ex
+        finally:
+            self.__release_fileinfo(fid, future)
         return info
 
     def _generate_upload_key(self, allow_timeout=False):
         """Generates a new upload key"""
 
         # Wait for server to set username if not set already.
-        while not self.user.nick:
-            with ARBITRATOR.condition:
-                ARBITRATOR.condition.wait()
+        self.user.wait_for_nick()
         while True:
             params = {
                 "name": self.user.nick,
@@ -850,73 +1043,100 @@ class Room:
         self.config.janitors.remove(janitor)
         self.__set_config_value("janitors", self.config.janitors)
 
+    @staticmethod
+    def __build_who(nick, address):
+        """Ban targets for a nick or address, or any iterable of either"""
+
+        ips = [{"ip": a} for a in aslist(address) if a]
+        return ips + [{"user": n} for n in aslist(nick) if n]
+
     def ban(self, nick="", address="", hours=6, reason="spergout", options=None):
+        """Bans nicks and/or addresses, each a single one or an iterable.
+        All of them are banned with a single call."""
+
         self.check_admin()
-        if nick == "" and address == "":
+        who = self.__build_who(nick, address)
+        if not who:
             return
-        who = []
-        options = options or {}
-        if address != "":
-            if isinstance(address, str):
-                who.append({"ip": address})
-            if isinstance(address, list):
-                for a in address:
-                    who.append({"ip": a})
-        if nick != "":
-            if isinstance(nick, str):
-                who.append({"user": nick})
-            if isinstance(nick, list):
-                for n in nick:
-                    who.append({"user": n})
-        ropts = {
-            "ban": False,
-            "hellban": False,
-            "mute": False,
-            "purgeFiles": False,
-            "hours": hours,
-            "reason": reason,
-        }
-        ropts.update(options)
+        ropts = {**BAN_OPTIONS, "hours": hours, "reason": reason}
+        if options:
+            ropts.update(options)
         self.conn.make_call("banUser", who, ropts)
 
     def unban(self, nick="", address="", reason="", options=None):
+        """Lifts bans of nicks and/or addresses, each a single one or an
+        iterable. All of them are unbanned with a single call."""
+
         self.check_admin()
-        if nick == "" and address == "":
+        who = self.__build_who(nick, address)
+        if not who:
             return
-        who = []
-        options = options or {}
-        if address != "":
-            if isinstance(address, str) and address != "":
-                who.append({"ip": address})
-            if isinstance(address, list):
-                for a in address:
-                    who.append({"ip": a})
-        if nick != "":
-            if isinstance(nick, str):
-                who.append({"user": nick})
-            if isinstance(nick, list):
-                for n in nick:
-                    who.append({"user": n})
-        ropts = {
-            "ban": True,
-            "hellban": True,
-            "mute": True,
-            "timeout": True,
-            "reason": reason,
-        }
-        ropts.update(options)
+        ropts = {**UNBAN_OPTIONS, "reason": reason}
+        if options:
+            ropts.update(options)
         self.conn.make_call("unbanUser", who, ropts)
 
 
+def run_ready(rooms, thread):
+    """Runs the queues of all rooms marked ready for the thread, until no
+    more are marked. Drops rooms without listeners from the rooms dict."""
+
+    ready = ARBITRATOR.take_ready(thread, rooms)
+    while ready:
+        for rid in ready:
+            room = rooms.get(rid)
+            if room is not None and not room.run_queues():
+                del rooms[rid]
+        # callbacks may have queued more, run that before waiting again
+        ready = ARBITRATOR.take_ready(thread, rooms)
+
+
 def listen_many(*rooms):
     """Listen for changes in all registered listeners in all specified rooms"""
 
-    rooms = set(r.conn for r in rooms)
-    for room in rooms:
+    rooms = {id(r.conn): r.conn for r in rooms}
+    for room in rooms.values():
+        room.validate_listeners()
+    thread = get_thread_ident()
+    condition = ARBITRATOR.condition
+    has_ready = ARBITRATOR.has_ready
+    # a live view, rooms dropped by run_ready disappear from it as well
+    conns = rooms.values()
+
+    def wakeup():
+        """Something to run for us, or nothing left to listen to"""
+        return has_ready(thread, rooms) or not any(r.connected for r in conns)
+
+    while any(r.connected for r in conns):
+        with condition:
+            # marks are set before waking us, so nothing slips through
+            condition.wait_for(wakeup)
+        # run callbacks without holding the condition, so they cannot
+        # stall other listening threads
+        run_ready(rooms, thread)
+        if not rooms:
+            return
+
+
+async def listen_many_async(*rooms):
+    """Like listen_many, but awaits changes instead of blocking the thread.
+    Run it on the asyncio loop of the thread that added the listeners."""
+
+    rooms = {id(r.conn): r.conn for r in rooms}
+    for room in rooms.values():
         room.validate_listeners()
-    with ARBITRATOR.condition:
-        while any(r.connected for r in rooms):
-            ARBITRATOR.condition.wait()
-            rooms = [r for r in rooms if r.run_queues()]
+    thread = get_thread_ident()
+    # one waiter per call, several may run on the same loop
+    waiter = asyncio.get_event_loop(), asyncio.Event()
+    event = waiter[1]
+    ARBITRATOR.waiters.add(waiter)
+    try:
+        while any(r.connected for r in rooms.values()):
+            if not ARBITRATOR.has_ready(thread, rooms):
+                await event.wait()
+            event.clear()
+            run_ready(rooms, thread)
             if not rooms:
                 return
+    finally:
+        ARBITRATOR.waiters.discard(waiter)